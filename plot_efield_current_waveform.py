@@ -28,9 +28,14 @@ Usage:
 
 import os
 
-import matplotlib.pyplot as plt
+# show and save the plot; set before pyplot is imported so that save-only runs
+# use the non-interactive Agg backend instead of initializing a GUI toolkit
+id_show, id_save = True, False
+
 import matplotlib as mpl
-import pandas as pd
+if not id_show:
+    mpl.use('Agg')
+import matplotlib.pyplot as plt
 
 import processing_tools as pt
 import settings as stg
@@ -49,9 +54,6 @@ minus_sign = u'\u2212'
 line_list = ['-', '-']
 
 # %%
-# show and save the plot
-id_show, id_save = True, False
-
 # figure dimensions as width and height
 fig_ratio, fig_res, fig_format = 1.6, 600, 'png'
 wid = 60
@@ -64,8 +66,8 @@ plot_dir = stg.DIR_SAVE_PLOT
 filename_bottom = os.path.join(data_dir, 'current_waveform_nautilus_20Vm_monophasic_bottom.csv')
 filename_top = os.path.join(data_dir, 'current_waveform_nautilus_20Vm_monophasic_top.csv')
 
-data_bottom = pd.read_csv(filename_bottom, delimiter=',', skiprows=lambda x: x in [1, 2])
-data_top = pd.read_csv(filename_top, delimiter=',', skiprows=lambda x: x in [1, 2])
+data_bottom = pt.load_waveform(filename_bottom, delimiter=',', skiprows=[1, 2])
+data_top = pt.load_waveform(filename_top, delimiter=',', skiprows=[1, 2])
 
 data_bottom.rename(columns={'x-axis': 'time', '1': 'current', '2': 'efield', '4': 'trigger'}, inplace=True)
 data_top.rename(columns={'x-axis': 'time', '1': 'current', '2': 'efield', '4': 'trigger'}, inplace=True)
@@ -79,77 +81,77 @@ time_micros = 1e6
 # there is 100 us delay from the mtms gate out to the pulse
 # measurement was done with 20 V/m
 epoch_id = [int(n*samp_freq/time_micros) for n in [112, 162]]
-efield_epoch = data_bottom.efield.values[epoch_id[0]:epoch_id[1]]
-efield_vm_scale_bot = 20/efield_epoch.mean()
-efield_epoch = data_top.efield.values[epoch_id[0]:epoch_id[1]]
-efield_vm_scale_top = 20/efield_epoch.mean()
+efield_bot = data_bottom['efield'].to_numpy()
+efield_top = data_top['efield'].to_numpy()
+efield_vm_scale_bot = 20/efield_bot[epoch_id[0]:epoch_id[1]].mean()
+efield_vm_scale_top = 20/efield_top[epoch_id[0]:epoch_id[1]].mean()
 
-# scale measurements:
+# scale measurements as plain numpy arrays, the dataframe is only the CSV container:
 # time -> microseconds
 # efield -> Volts/meters
 # current -> kiloAmperes
 
-data_bottom.time = data_bottom.time*time_micros
-data_bottom['efield_vm'] = data_bottom.efield*efield_vm_scale_bot
-data_bottom.current = data_bottom.current*rogowski_scale
-
-data_top.time = data_top.time*time_micros
-data_top['efield_vm'] = data_top.efield*efield_vm_scale_top
-data_top.current = data_top.current*rogowski_scale
+x_bot = data_bottom['time'].to_numpy()*time_micros
+x_top = data_top['time'].to_numpy()*time_micros
+current_bot = data_bottom['current'].to_numpy()*rogowski_scale
+current_top = data_top['current'].to_numpy()*rogowski_scale
 
 # %
 # apply low pass fielter to measurements for smoother visualization
-data_bottom['current_filt'] = pt.lowpass_filter(data_bottom.current.values, cutoff, samp_freq, order=2)
-data_bottom['efield_filt'] = pt.lowpass_filter(data_bottom.efield_vm.values, cutoff, samp_freq, order=2)
-data_top['current_filt'] = pt.lowpass_filter(data_top.current.values, cutoff, samp_freq, order=2)
-data_top['efield_filt'] = pt.lowpass_filter(data_top.efield_vm.values, cutoff, samp_freq, order=2)
+current_filt_bot = pt.lowpass_filter(current_bot, cutoff, samp_freq, order=2)
+efield_filt_bot = pt.lowpass_filter(efield_bot*efield_vm_scale_bot, cutoff, samp_freq, order=2)
+current_filt_top = pt.lowpass_filter(current_top, cutoff, samp_freq, order=2)
+efield_filt_top = pt.lowpass_filter(efield_top*efield_vm_scale_top, cutoff, samp_freq, order=2)
 
 # %
 color_bot = '#0072BD'  # blue
 color_top = '#D95319'  # orange
 
-x_bot = data_bottom.time.values
-x_top = data_top.time.values
-
 fig, axs = plt.subplots(ncols=1, nrows=2, figsize=fig_dim)
+
+# ticks and labels per subplot: 0 is current and 1 is efield
 xticks_list = [10, 70, 100, 140]
+yticks_dict = {0: [0, 0.5, 1.], 1: [-20, 0, 20]}
+yticks_labels_dict = {0: [0, 0.5, 1.], 1: ['{}20'.format(minus_sign), '0', ' 20']}
+xticks_labels_dict = {0: 4*[' '], 1: ['0', '60', '90', '130']}
 
 # n to plot: 0 is current and 1 is efield
 for n, ax in enumerate(axs):
 
     if n:
-        yticks_list = [-20, 0, 20]
-        yticks_labels = ['{}20'.format(minus_sign), '0', ' 20']
-        xticks_labels = ['0', '60', '90', '130']
-        y_bot = data_bottom.efield_filt.values
-        y_top = data_top.efield_filt.values
+        y_bot = efield_filt_bot
+        y_top = efield_filt_top
 
         ax.set_ylabel('E-field (V/m)', labelpad=2)
         ax.set_xlabel('Time (µs)', labelpad=2)
         ax.set_ylim([-65, 50])
 
     else:
-        yticks_list = [0, 0.5, 1.]
-        yticks_labels = yticks_list
-        xticks_labels = 4*[' ']
         # current on bottom coil was negative
-        y_bot = -data_bottom.current_filt.values
-        y_top = data_top.current_filt.values
+        y_bot = -current_filt_bot
+        y_top = current_filt_top
 
         ax.set_ylabel('Current (kA)', labelpad=2)
 
-    pl_top = ax.plot(x_top, y_top, linestyle=line_list[n], color=color_top,
-                 linewidth=1.5, zorder=2, label='Top')
-    pl_bot = ax.plot(x_bot, y_bot, linestyle=line_list[n], color=color_bot,
-                 linewidth=1.5, zorder=2, label='Bottom')
+    # downsample traces to reduce the vertex count rendered by matplotlib;
+    # the scope captures have ~2000 samples, so the target must sit below that
+    # for the decimation to engage
+    x_top_dec, y_top_dec = pt.decimate_for_plot(x_top, y_top, n_target=1000)
+    x_bot_dec, y_bot_dec = pt.decimate_for_plot(x_bot, y_bot, n_target=1000)
+
+    # rasterize the dense traces on save while keeping axes and text as vector
+    pl_top = ax.plot(x_top_dec, y_top_dec, linestyle=line_list[n], color=color_top,
+                 linewidth=1.5, zorder=2, label='Top', rasterized=True)
+    pl_bot = ax.plot(x_bot_dec, y_bot_dec, linestyle=line_list[n], color=color_bot,
+                 linewidth=1.5, zorder=2, label='Bottom', rasterized=True)
 
     # customize plot aesthetics
     ax.set_xticks(xticks_list)
-    ax.set_xticklabels(xticks_labels, rotation=0)
+    ax.set_xticklabels(xticks_labels_dict[n], rotation=0)
     ax.set_xlim([0, 160])
 
-    ax.set_yticks(yticks_list)
-    ax.set_yticklabels(yticks_labels, rotation=0)
+    ax.set_yticks(yticks_dict[n])
+    ax.set_yticklabels(yticks_labels_dict[n], rotation=0)
 
     ax.tick_params(width=1.5, length=3., direction='in', top=False, right=False)
     ax.xaxis.grid(True, zorder=1, color=3*[0.9], linewidth=1.)
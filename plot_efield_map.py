@@ -27,8 +27,14 @@ Usage:
 """
 import os
 
+# show and save the plot; set before pyplot is imported so that save-only runs
+# use the non-interactive Agg backend instead of initializing a GUI toolkit
+id_show, id_save = True, True
+
 import numpy as np
 import matplotlib as mpl
+if not id_show:
+    mpl.use('Agg')
 from matplotlib import cm
 import matplotlib.pyplot as plt
 import matplotlib.tri as tri
@@ -49,9 +55,6 @@ deg_sign = u'\xb0'
 en_dash = u'\u2013'
 
 # %%
-# show the plot
-id_show, id_save = True, True
-
 # directions = (0, 45, 90)
 # figure dimensions as width and height
 fig_ratio, fig_res, fig_format = 3., 600, 'png'
@@ -68,19 +71,22 @@ filename_list = ('0', '45', '90')
 # %
 fig, axs = plt.subplots(nrows=3, ncols=1, figsize=fig_dim)
 
+# triangulation and refined mesh shared across maps measured on the same grid
+triang, tri_refi, tri_index = None, None, None
+
 # n to plot: 0, 1, 2 is 0, 45, 90-degree maps
 for n, ax in enumerate(axs):
 
     # Load field values
     filepath = os.path.join(data_dir, 'efield_map_20Vm_{}deg.txt'.format(filename_list[n]))
-    pos, ef, efn = pt.read_efield(filepath)
+    efield = pt.read_efield(filepath)
     scale_pos = 1000  # Scale coordinates from m to mm
-    pos *= scale_pos
+    x, y = efield.x * scale_pos, efield.y * scale_pos
     ax_lim = 71
 
-    enor = np.linalg.norm(ef, axis=1).tolist()
-    enor = [en - min(enor) for en in enor]
-    enor = [en / max(enor) for en in enor]
+    enor = np.sqrt(efield.ex ** 2 + efield.ey ** 2 + efield.ez ** 2)
+    enor -= enor.min()
+    enor /= enor.max()
 
     # Creates extra circles and lines in plot
     in_circle = plt.Circle((0, 0), 70, color=[col/255. for col in 3*[127.]], zorder=1)
@@ -90,17 +96,29 @@ for n, ax in enumerate(axs):
     norm.autoscale(enor)
     colormap = mpl.colormaps['cividis']
 
-    z = np.array(enor)
-    x, y = pos[:, 0], pos[:, 1]
-
-    # create triangles based on point coordinates
-    triang = tri.Triangulation(x, y)
+    z = enor
+
+    # create triangles based on point coordinates; the three maps share the
+    # sampling grid, so build the triangulation and refined mesh only once
+    if triang is None or not (np.array_equal(x, triang.x) and np.array_equal(y, triang.y)):
+        triang = tri.Triangulation(x, y)
+        # refine the triangulation by a subdivision of 2, keeping the parent
+        # triangle of each refined node so the interpolation below stays inside
+        # the triangulation even for boundary nodes subject to float round-off
+        refiner = tri.UniformTriRefiner(triang)
+        tri_refi, tri_index = refiner.refine_triangulation(return_tri_index=True, subdiv=2)
     # the cubic interpolation causes a peak in amplitude, better to use the linear
     interp_lin = tri.LinearTriInterpolator(triang, z)
-    # refine the triangulation by a subdivision of 2
-    refiner = tri.UniformTriRefiner(triang)
-    tri_refi, z_test_refi = refiner.refine_field(z, triinterpolator=interp_lin,
-                                                 subdiv=2)
+    try:
+        # private matplotlib entry point: evaluate each refined node inside its
+        # known parent triangle so hull boundary nodes do not come back masked
+        z_test_refi = interp_lin._interpolate_multikeys(tri_refi.x, tri_refi.y,
+                                                        tri_index=tri_index)[0]
+    except (AttributeError, TypeError):
+        # the internals changed in a newer matplotlib: fall back to the public
+        # (slower) refinement, which re-subdivides the mesh per map
+        tri_refi, z_test_refi = tri.UniformTriRefiner(triang).refine_field(
+            z, triinterpolator=interp_lin, subdiv=2)
     ax.tricontourf(tri_refi, z_test_refi, cmap=colormap, levels=9, zorder=3)
 
     fc = colormap(norm(enor))
@@ -28,9 +28,14 @@ Usage:
 
 import os
 
-import matplotlib.pyplot as plt
+# show and save the plot; set before pyplot is imported so that save-only runs
+# use the non-interactive Agg backend instead of initializing a GUI toolkit
+id_show, id_save = True, False
+
 import matplotlib as mpl
-import pandas as pd
+if not id_show:
+    mpl.use('Agg')
+import matplotlib.pyplot as plt
 
 import processing_tools as pt
 import settings as stg
@@ -43,14 +48,20 @@ mpl.rcParams['axes.linewidth'] = 1.0
 leg_font_size = 7
 
 mm2in = lambda mm: (mm/2.54)*0.1
+
+
+def _rescale_to_peak_one(y):
+    # rescale from minimum norm to 1 because the lowpass filter might reduce the normalized peak to below 1
+    y_min, y_max = y.min(), y.max()
+    return y_min + (y - y_min) * (1. - y_min) / (y_max - y_min)
+
+
+
 deg_sign = u'\xb0'
 en_dash = u'\u2013'
 line_list = ['--', '-']
 
 # %
-# show and save the plot
-id_show, id_save = True, False
-
 # figure dimensions as width and height
 fig_ratio, fig_res, fig_format = 1.6, 600, 'png'
 wid = 60
@@ -69,37 +80,35 @@ color_top = '#D95319'  # orange
 
 xticks_list = [-100, -50, 0, 50, 100]
 yticks_list = [0, 0.5, 1.0]
+yticks_labels = ['0', ' ', '1']
+xticks_labels_blank = len(xticks_list)*[' ']
 
 fig, axs = plt.subplots(ncols=1, nrows=2, figsize=fig_dim)
 
 # n to plot: 0 is parallel and 1 is perpendicular
 for n, ax in enumerate(axs):
     filename = os.path.join(data_dir, 'efield_profile_20Vm_{}.csv'.format(directions[n]))
-    data = pd.read_csv(filename)
+    data = pt.load_waveform(filename)
 
     samp_freq = 1e3 / (data.x_mm[1] - data.x_mm[0])
     cutoff = 50
     data['efield_top_filt'] = pt.lowpass_filter(data.efield_top.values, cutoff, samp_freq, order=2)
     data['efield_bottom_filt'] = pt.lowpass_filter(data.efield_bottom.values, cutoff, samp_freq, order=2)
 
-    # rescale from minimum norm to 1 because the lowpass filter might reduce the normalized peak to below 1
-    y_filt = data['efield_top_filt']
-    data['efield_top_filt'] = y_filt.min() + ((y_filt - y_filt.min()) * (1 - y_filt.min())) / (
-                y_filt.max() - y_filt.min())
-    y_filt = data['efield_bottom_filt']
-    data['efield_bottom_filt'] = y_filt.min() + ((y_filt - y_filt.min()) * (1 - y_filt.min())) / (
-                y_filt.max() - y_filt.min())
+    data.loc[:, 'efield_top_filt'] = _rescale_to_peak_one(data['efield_top_filt'].to_numpy())
+    data.loc[:, 'efield_bottom_filt'] = _rescale_to_peak_one(data['efield_bottom_filt'].to_numpy())
 
+    # rasterize the dense traces on save while keeping axes and text as vector
     pl_top = ax.plot(data.x_mm, data.efield_top_filt, linestyle=line_list[n], color=color_top,
-                     linewidth=1.5, zorder=2, label='Top')
+                     linewidth=1.5, zorder=2, label='Top', rasterized=True)
     pl_bot = ax.plot(data.x_mm, data.efield_bottom_filt, linestyle=line_list[n], color=color_bot,
-                     linewidth=1.5, zorder=2, label='Bottom')
+                     linewidth=1.5, zorder=2, label='Bottom', rasterized=True)
 
     y_lim_perp = (-0.30, 1.06)
     ax.set_ylim(y_lim_perp)
     ax.set_yticks(yticks_list)
     ax.set_xticks(xticks_list)
-    ax.set_yticklabels(['0', ' ', '1'], rotation=0)
+    ax.set_yticklabels(yticks_labels, rotation=0)
     ax.tick_params(width=1.5, length=3., direction='in', top=False, right=False)
     ax.xaxis.grid(True, zorder=1, color=3*[0.9], linewidth=1.)
 
@@ -113,7 +122,7 @@ for n, ax in enumerate(axs):
                         fontsize=leg_font_size, handlelength=1., ncol=1, handletextpad=0.5,
                         bbox_to_anchor=(1., 0.98))
     else:
-        ax.set_xticklabels(5*[' '], rotation=0)
+        ax.set_xticklabels(xticks_labels_blank, rotation=0)
 
     ax.set_title('{}'.format(directions[n].capitalize()), pad=2, fontsize=8)
 
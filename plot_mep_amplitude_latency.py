@@ -34,12 +34,18 @@ Usage:
 
 import os
 
+# show and save the plot; set before pyplot is imported so that save-only runs
+# use the non-interactive Agg backend instead of initializing a GUI toolkit
+id_show, id_save = True, True
+
 import matplotlib as mpl
+if not id_show:
+    mpl.use('Agg')
 import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
 import seaborn as sns
 
+import processing_tools as pt
 import settings as stg
 
 
@@ -61,9 +67,6 @@ minus_sign = u'\u2212'
 micro_sign = u'\u00b5'
 
 # %
-# show and save the plot
-id_show, id_save = True, True
-
 # figure dimensions as width and height
 fig_ratio, fig_res, fig_format = 1.3, 600, 'png'
 fig_dim = (mm2in(1.*200), mm2in(60))
@@ -74,7 +77,7 @@ orientations = np.linspace(np.pi/2, -(3/2)*np.pi, 9)[:-1]
 filename_png = os.path.join(stg.DIR_SAVE_PLOT, 'mep_{}.{}')
 filename = os.path.join(stg.DIR_MEP, 'mep_amplitude_latency.csv')
 
-df_all = pd.read_csv(filename)
+df_all = pt.load_waveform(filename)
 
 mask = df_all['orientation'] > 180
 df_all.loc[mask, 'orientation'] = df_all.loc[mask, 'orientation'] - 360
@@ -82,18 +85,7 @@ df_all.sort_values(by=['brain', 'paw', 'orientation'], inplace=True)
 df_all['orientation_rad'] = np.deg2rad(df_all['orientation'])
 
 # create column with contralateral and ipsilateral labels
-df_all['mep_side'] = df_all['paw'].copy(deep=True)
-brain_unique, paw_unique = df_all['brain'].unique(), df_all['paw'].unique()
-combination = np.array(np.meshgrid(paw_unique, brain_unique)).reshape(4, 2)
-combination[1, :] = combination[1, ::-1]
-
-for n in combination:
-    if n[0] == n[1]:
-        label = 'ipsilateral'
-    else:
-        label = 'contralateral'
-    mask = (df_all['brain'] == n[0]) & (df_all['paw'] == n[1])
-    df_all.loc[mask, 'mep_side'] = label
+df_all['mep_side'] = np.where(df_all['brain'] == df_all['paw'], 'ipsilateral', 'contralateral')
 
 # %%
 measure = ['amplitude', 'latency']
@@ -101,54 +93,89 @@ measure_units = ['{}V'.format(micro_sign), 'ms']
 x_axis_label = [" ", " "]
 n_orientations = df_all.orientation.unique().size
 
-for id_measure in range(len(measure)):
-    df_plot = df_all.copy(deep=True)
-    if id_measure:
-        df_plot = df_plot[df_plot[measure[id_measure]] != 0]
-
-    g = sns.catplot(x="orientation", y=measure[id_measure], col="brain", hue="mep_side", dodge=False,
-                    data=df_plot, kind="point", height=fig_dim[1], aspect=fig_ratio, estimator=np.median,
-                    sharey=True, sharex=True, legend=True, palette=[3*[0.], 3*[0.6]],
-                    err_kws={'linewidth': 1.7}, markers=['o', 'D'], markersize=4, linewidth=1.5)
+# one subplot per hemisphere, one line per MEP side
+brain_list = df_all['brain'].unique()
+side_list = ['contralateral', 'ipsilateral']
+side_color = {'contralateral': 3*[0.], 'ipsilateral': 3*[0.6]}
+side_marker = {'contralateral': 'o', 'ipsilateral': 'D'}
 
-    if id_measure:
-        g.set(xticks=[n for n in range(n_orientations)], xlim=[-0.5, n_orientations], ylim=[0, 16],
-              yticks=[0, 5, 10, 15], yticklabels=[0, 5, 10, ' 15'],
-              xticklabels=['{}135'.format(minus_sign), '{}90'.format(minus_sign), '{}45'.format(minus_sign),
-                           0, 45, 90, 135])
-    else:
-        g.set(xticks=[n for n in range(n_orientations)], yticks=[0, 50, 100],
-              xlim=[-0.5, n_orientations], ylim=[-1, 110],
-              xticklabels=['{}135'.format(minus_sign), '{}90'.format(minus_sign), '{}45'.format(minus_sign),
-                           0, 45, 90, 135])
+# categorical x axis shared across subplots
+orientation_order = np.sort(df_all['orientation'].unique())
 
-    g.figure.text(0.25, 0.065, 'Orientation ({})'.format(deg_sign), ha='center', va='center', fontsize=fontsize)
+# facet geometry as in the former catplot: one aspect*height panel per
+# hemisphere, plus explicit allowances for the y label/tick margins and the
+# legend so tight_layout does not shrink the panels below the catplot width
+facet_wid = brain_list.size*fig_ratio*fig_dim[1]
+margin_wid = mm2in(15)
+legend_wid = mm2in(30)
 
-    g.set_axis_labels(x_axis_label[id_measure], "MEP {} ({})".format(measure[id_measure], measure_units[id_measure]),
-                      fontsize=fontsize)
+xticks_list = [n for n in range(n_orientations)]
+xticks_labels = ['{}135'.format(minus_sign), '{}90'.format(minus_sign), '{}45'.format(minus_sign),
+                 0, 45, 90, 135]
 
-    # Customize legend
-    g._legend.set_title('MEP side')
-    plt.setp(g._legend.get_title(), fontsize=fontsize)
-    plt.setp(g._legend.get_texts(), fontsize=fontsize)
+for id_measure in range(len(measure)):
+    if id_measure:
+        # keep only rows with a detected latency; the boolean filter copies
+        # just the rows needed instead of deep-copying the whole dataframe
+        df_plot = df_all.loc[df_all[measure[id_measure]] != 0]
+    else:
+        df_plot = df_all
+
+    # summarize each group with median and interquartile range in a single
+    # vectorized pass instead of seaborn's per-group bootstrap
+    quartiles = df_plot.groupby(['brain', 'mep_side', 'orientation'])[measure[id_measure]].quantile(
+        [0.25, 0.5, 0.75]).unstack()
+
+    fig, axes = plt.subplots(ncols=brain_list.size, sharey=True, sharex=True,
+                             figsize=(facet_wid + margin_wid + legend_wid, fig_dim[1]))
+
+    for ax, brain in zip(axes, brain_list):
+        for side in side_list:
+            # reindex on the shared orientation axis so absent orientations
+            # become NaN and the line breaks instead of joining across gaps
+            stats = quartiles.loc[(brain, side)].reindex(orientation_order)
+            x = np.arange(n_orientations)
+            median = stats[0.5].to_numpy()
+            yerr = np.vstack((median - stats[0.25].to_numpy(), stats[0.75].to_numpy() - median))
+
+            ax.errorbar(x, median, yerr=yerr, color=side_color[side], marker=side_marker[side],
+                        markersize=4, linewidth=1.5, elinewidth=1.7, markeredgecolor=3*[1.],
+                        markeredgewidth=0.7, label=side)
+
+        if id_measure:
+            ax.set(xticks=xticks_list, xlim=[-0.5, n_orientations], ylim=[0, 16],
+                   yticks=[0, 5, 10, 15])
+            ax.set_yticklabels([0, 5, 10, ' 15'])
+        else:
+            ax.set(xticks=xticks_list, xlim=[-0.5, n_orientations], ylim=[-1, 110],
+                   yticks=[0, 50, 100])
+        ax.set_xticklabels(xticks_labels)
 
-    axes = g.axes.flatten()
-    for ax, st in zip(axes, g.axes_dict):
         sns.despine(ax=ax, offset=10, trim=True)
         ax.tick_params(axis='x', labelsize=fontsize)
         ax.tick_params(axis='y', labelsize=fontsize)
-        ax.set_title("")
         ax.tick_params(length=3.)
+        ax.set_xlabel(x_axis_label[id_measure], fontsize=fontsize)
+
+    axes[0].set_ylabel("MEP {} ({})".format(measure[id_measure], measure_units[id_measure]),
+                       fontsize=fontsize)
+
+    leg = axes[-1].legend(title='MEP side', loc='center left', bbox_to_anchor=(1.02, 0.5),
+                          fontsize=fontsize, frameon=False)
+    plt.setp(leg.get_title(), fontsize=fontsize)
+
+    # place the panels explicitly so they keep the full catplot facet width;
+    # tight_layout would shrink them again to carve out the label margins
+    fig_wid = facet_wid + margin_wid + legend_wid
+    fig.subplots_adjust(left=margin_wid/fig_wid, right=(margin_wid + facet_wid)/fig_wid,
+                        bottom=0.18, top=0.97, wspace=0.15)
 
-        for clcs in ax.collections:
-            clcs.set_edgecolor([1., 1., 1.])
-            clcs.set_linewidth(0.7)
+    fig.text(0.25, 0.03, 'Orientation ({})'.format(deg_sign), ha='center', va='center', fontsize=fontsize)
 
     # show and/or save figure
     if id_show:
-        g.tight_layout()
         plt.show()
 
     if id_save:
-        g.savefig(filename_png.format(measure[id_measure], fig_format),
-                  dpi=fig_res, bbox_inches='tight', pad_inches=0.05, transparent=False)
+        fig.savefig(filename_png.format(measure[id_measure], fig_format),
+                    dpi=fig_res, bbox_inches='tight', pad_inches=0.05, transparent=False)
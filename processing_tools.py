@@ -16,62 +16,132 @@ Description of the tools and methods for recording the data are described in the
 
 """
 
+import collections
+import functools
+import os
+
 import matplotlib.pyplot as plt
 import numpy as np
-from scipy.signal import butter, filtfilt, find_peaks, peak_widths
+import pandas as pd
+from scipy.signal import butter, sosfiltfilt
+
+
+def load_waveform(filepath, delimiter=',', skiprows=None):
+    """Read a measurement CSV, caching the parsed dataframe as parquet.
+
+    The first call parses the CSV and writes a sibling .parquet file;
+    later calls load the parquet directly, which is much faster than
+    re-parsing the CSV on every plot iteration. The cache is refreshed
+    whenever the CSV is newer than the parquet file.
+    """
+    cache_path = os.path.splitext(filepath)[0] + '.parquet'
+    if os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(filepath):
+        return pd.read_parquet(cache_path)
+
+    data = pd.read_csv(filepath, delimiter=delimiter, skiprows=skiprows)
+    data.to_parquet(cache_path, compression='zstd')
+    return data
+
+
+@functools.lru_cache(maxsize=None)
+def _butter_coefficients(order, low_cut, fs, btype='low'):
+    return butter(order, low_cut, btype=btype, fs=fs, output='sos')
 
 
 def lowpass_filter(data, low_cut, fs, order):
-    # Get the filter coefficients
-    b, a = butter(order, low_cut, btype='low', fs=fs)
-    return filtfilt(b, a, data)
+    # Get the filter coefficients, cached as the scripts reuse the same design
+    sos = _butter_coefficients(order, low_cut, fs)
+    return sosfiltfilt(sos, data)
+
+
+def decimate_for_plot(x, y, n_target=2000):
+    """Downsample a trace for plotting with largest-triangle-three-buckets.
+
+    Keeps the first and last samples and selects, from each bucket, the
+    point forming the largest triangle with the previously selected point
+    and the average of the next bucket. This preserves the visual shape of
+    the waveform while cutting the number of vertices matplotlib renders.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    n = x.size
+    if n_target >= n or n_target < 3:
+        return x, y
+
+    # bucket edges for all points except the fixed first and last samples
+    edges = np.linspace(1, n - 1, n_target - 1).astype(int)
+    ids = np.empty(n_target, dtype=int)
+    ids[0], ids[-1] = 0, n - 1
+
+    a = 0
+    for k in range(n_target - 2):
+        lo, hi = edges[k], edges[k + 1]
+        if k < n_target - 3:
+            x_avg = x[hi:edges[k + 2]].mean()
+            y_avg = y[hi:edges[k + 2]].mean()
+        else:
+            x_avg, y_avg = x[-1], y[-1]
+        area = np.abs((x[a] - x_avg) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (y_avg - y[a]))
+        a = lo + np.argmax(area)
+        ids[k + 1] = a
+
+    return x[ids], y[ids]
+
+
+# Structure-of-arrays container for the measured E-field samples; downstream
+# code consumes the coordinates and field components as independent columns,
+# so contiguous 1D arrays avoid the strided (N, 3) views
+EFieldData = collections.namedtuple('EFieldData', ['x', 'y', 'z', 'ex', 'ey', 'ez'])
 
 
 def read_efield(filepath):
-    pos = np.zeros([1000, 3])
-    ef = np.zeros([1000, 3])
-    efn = np.zeros([1000, 3])
-    enor = []
-    k = 0
-
-    content = [s.rstrip() for s in open(filepath)]
-    for data in content:
-        line = [s for s in data.split()]
-        pos[k, ...] = float(line[0]), float(line[1]), float(line[2])
-        ef[k, ...] = -float(line[3]), -float(line[4]), -float(line[5])
-        # Normalize each vector of E-field, all will have norm 1 to
-        # better scaling in quiver plot
-        enor.append((np.sqrt(ef[k, 0] ** 2 + ef[k, 1] ** 2 + ef[k, 2] ** 2)).tolist())
-        efn[k, ...] = ef[k, ...] / enor[k]
-        k += 1
-
-    # Sort all arrays according to crescent Z coordinate
-    ids = np.argsort(pos[..., 2])
-    ids_v = np.sort(pos[..., 2])
-    pos_s = pos[ids[::1], ...]
-    ef_s = ef[ids[::1], ...]
-    efn_s = efn[ids[::1], ...]
-
-    # Slice second part of coordinates array removing vectors in steps of stp
-    ini = 200
-    stp = 1
-
-    pos_up = pos_s[:ini, ...]
-    pos_down = pos_s[ini::stp, ...]
-    ef_up = ef_s[:ini, ...]
-    ef_down = ef_s[ini::stp, ...]
-    efn_up = efn_s[:ini, ...]
-    efn_down = efn_s[ini::stp, ...]
-
-    return np.vstack((pos_up, pos_down)), np.vstack((ef_up, ef_down)), np.vstack((efn_up, efn_down))
+    # the pandas C tokenizer parses the whitespace-separated table in a single
+    # pass, noticeably faster than np.loadtxt on these files
+    raw = pd.read_csv(filepath, sep=r'\s+', header=None, engine='c', dtype=np.float64).to_numpy()
+    # Sort all samples according to crescent Z coordinate
+    raw = raw[np.argsort(raw[:, 2], kind='stable')]
+
+    x, y, z = (np.ascontiguousarray(raw[:, k]) for k in range(3))
+    ex, ey, ez = (np.ascontiguousarray(-raw[:, k]) for k in range(3, 6))
+
+    return EFieldData(x, y, z, ex, ey, ez)
+
+
+def _find_fwhm(y, sampling_freq):
+    # width measurement for a known-unimodal profile: locate the global maximum
+    # and walk outwards to the reference-level crossings, linearly
+    # interpolating between the samples bracketing each crossing
+    peak = int(np.argmax(y))
+    # measure at the prominence-relative level used by scipy's
+    # peak_widths(..., rel_height=1-1/sqrt(2)): the prominence of the global
+    # maximum reaches down to the higher of the two lowest points on each
+    # side, not to zero, so the absolute max/sqrt(2) level would shift the
+    # reported widths whenever the peak base is above zero
+    base = max(y[:peak + 1].min(), y[peak:].min())
+    level = y[peak] - (1 - 1 / np.sqrt(2)) * (y[peak] - base)
+
+    t1 = 0.
+    for k in range(peak, 0, -1):
+        if y[k - 1] < level:
+            t1 = (k - 1) + (level - y[k - 1]) / (y[k] - y[k - 1])
+            break
+
+    t2 = y.size - 1.
+    for k in range(peak, y.size - 1):
+        if y[k + 1] < level:
+            t2 = k + (y[k] - level) / (y[k] - y[k + 1])
+            break
+
+    return (t2 - t1) * sampling_freq, level, t1, t2
 
 
 def fwhm_efield(x_raw, y_raw, n=20, id_vis=True):
     # spatial sampling frequency to convert the FWHM from index to millimeter
     sampling_freq = x_raw[1] - x_raw[0]
 
-    # make a polynomial fit
-    p_mm = np.poly1d(np.polyfit(x_raw, y_raw, n))
+    # make a polynomial fit; Polynomial.fit centers and scales x internally,
+    # which keeps the Vandermonde matrix well conditioned at high degree
+    p_mm = np.polynomial.Polynomial.fit(x_raw, y_raw, n)
     y_fit = p_mm(x_raw)
     # normalize data so that maximum is 1 and minimum as kept the same
     y_fit = y_fit.min() + ((y_fit - y_fit.min())*(1-y_fit.min()))/(y_fit.max() - y_fit.min())
@@ -79,24 +149,21 @@ def fwhm_efield(x_raw, y_raw, n=20, id_vis=True):
     # use the absolute to provide the correct FWHM, otherwise the baseline is considered the negative values and not zero
     # using just the absolute e-field provides the correct FWHM, as already checked
     y_fit_abs = np.abs(y_fit)
-    peaks, _ = find_peaks(y_fit_abs, height=0.5)
-    half_widths = peak_widths(y_fit_abs, peaks, rel_height=1-1/np.sqrt(2))
+    # the crossings are found in the indices scale and converted with the
+    # sampling frequency, as the scan does not know what is the x scale
+    xfwhm, yfwhm, t1, t2 = _find_fwhm(y_fit_abs, sampling_freq)
 
-    t1_ind = half_widths[2].round().astype(int)
-    t2_ind = half_widths[3].round().astype(int)
-
-    # the default width is given in the indices scale as the function peak_widths does not know what is the x scale
-    # xfwhm = half_widths[0]
-    # xfwhm = np.abs(x_raw[t1_ind] - x_raw[t2_ind])[0]
-    xfwhm = half_widths[0][0]*sampling_freq
-    yfwhm = half_widths[1]
+    t1_ind = int(round(t1))
+    t2_ind = int(round(t2))
 
     if id_vis:
+        peak = np.argmax(y_fit_abs)
+
         fig_fwhm, ax_fwhm = plt.subplots(ncols=1, figsize=(6, 6))
         ax_fwhm.plot(y_raw, 'kx')
         ax_fwhm.plot(y_fit)
-        ax_fwhm.plot(peaks, y_fit[peaks], "o", markersize=10)
-        ax_fwhm.hlines(*half_widths[1:], color="C2")
+        ax_fwhm.plot(peak, y_fit[peak], "o", markersize=10)
+        ax_fwhm.hlines(yfwhm, t1, t2, color="C2")
 
         # plot the absolute e-field
         # ax.plot(y_efield_abs, 'r--')
@@ -17,21 +17,38 @@ Usage:
 """
 
 # %%
+import functools
 import os
+
 import dotenv
 
 # %%
 
-dotenv.load_dotenv(dotenv.find_dotenv())
+
+@functools.cache
+def _dotenv_path():
+    # find_dotenv walks up the directory tree looking for the .env file,
+    # so resolve the location only once per process
+    return dotenv.find_dotenv()
+
+
+def _path_from_env(var):
+    # build the path only when the variable is defined, keeping the module
+    # importable in environments where some directories are not configured
+    value = os.getenv(var)
+    return os.path.join(DIR_ROOT, value) if value else None
+
+
+dotenv.load_dotenv(_dotenv_path())
 
 DIR_ROOT = os.getcwd()
 
-DIR_ACOUSTIC = os.path.join(DIR_ROOT, os.getenv('DIR_ACOUSTIC'))
+DIR_ACOUSTIC = _path_from_env('DIR_ACOUSTIC')
 
-DIR_EFIELD_CURRENT = os.path.join(DIR_ROOT, os.getenv('DIR_EFIELD_CURRENT'))
+DIR_EFIELD_CURRENT = _path_from_env('DIR_EFIELD_CURRENT')
 
-DIR_MEP = os.path.join(DIR_ROOT, os.getenv('DIR_MEP'))
+DIR_MEP = _path_from_env('DIR_MEP')
 
-DIR_MRI = os.path.join(DIR_ROOT, os.getenv('DIR_MRI'))
+DIR_MRI = _path_from_env('DIR_MRI')
 
-DIR_SAVE_PLOT = os.path.join(DIR_ROOT, os.getenv('DIR_SAVE_PLOT'))
+DIR_SAVE_PLOT = _path_from_env('DIR_SAVE_PLOT')